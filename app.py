@@ -4,23 +4,29 @@
 # - Simple newborn danger-sign checker (rule-based)
 # - If urgency is high, optionally find nearby hospitals from OpenStreetMap
 # - Overlay specialty info (pediatric cardiology / CHD facilities) using a small curated list
-# - Interactive map via Folium inside Streamlit
+# - Interactive map via Folium inside Streamlit (pydeck WebGL layer for large result sets)
 # ---------------------------------------------------------------
 
 import streamlit as st
+import streamlit.components.v1 as components
+
+st.set_page_config(page_title="Newborn Danger Chatbot (Kenya)", page_icon="🍼", layout="wide")
+
+import math
+import os
 import re
+import numpy as np
+from types import SimpleNamespace
 from typing import Dict, List, Tuple, Optional
 
-# GIS + data tools
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
-import osmnx as ox
-import folium
-from streamlit_folium import st_folium
+# Symptom matching tools (GIS libraries are imported lazily, see _gis/_geocoder)
+import diskcache
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from rapidfuzz import process, fuzz
-# Shapely 2.x import fix
-from shapely.geometry import Point
-from shapely.geometry.base import BaseGeometry
+import ahocorasick
 
 
 # ------------------------------
@@ -50,93 +56,386 @@ danger_signs: Dict[str, Dict[str, str]] = {
     },
 }
 
+RANK_NAME = ["advice", "monitor", "urgent", "emergency"]
+URGENCY_RANK = {k: RANK_NAME.index(v["urgency"]) for k, v in danger_signs.items()}
+
 CARDIAC_KEYWORDS = {"blue", "cyanosis", "murmur", "sweating while feeding", "sweaty", "poor feeding", "fast breathing", "breathing difficulty", "heart", "chest retractions"}
 
-SPECIALTY_FACILITIES = [
-    {"facility_name": "Kenyatta National Hospital", "county": "Nairobi", "has_pediatric_cardiologist": True, "has_chd_facilities": True},
-    {"facility_name": "Aga Khan University Hospital Nairobi", "county": "Nairobi", "has_pediatric_cardiologist": True, "has_chd_facilities": True},
-    {"facility_name": "Gertrude's Children's Hospital", "county": "Nairobi", "has_pediatric_cardiologist": True, "has_chd_facilities": True},
-]
+# Curated specialty facilities, stored column-wise (one entry per facility in each column).
+SPEC_NAMES: Tuple[str, ...] = (
+    "Kenyatta National Hospital",
+    "Aga Khan University Hospital Nairobi",
+    "Gertrude's Children's Hospital",
+)
+SPEC_COUNTY: Tuple[str, ...] = ("Nairobi", "Nairobi", "Nairobi")
+SPEC_PED = np.array([True, True, True], dtype=bool)  # has pediatric cardiologist
+SPEC_CHD = np.array([True, True, True], dtype=bool)  # has CHD facilities
 
 # ------------------------------
 # 2) Helper functions
 # ------------------------------
 
+# RapidFuzz score cutoffs (0-100); scores below them are pruned inside RapidFuzz.
+# Symptoms use WRatio. Facilities use token_sort_ratio over facility_key(), with
+# generic words removed. The cutoff alone can't stop matches on a shared word
+# like "hospital", which WRatio scores at 85.5 for any "<X> Hospital".
+SYMPTOM_MATCH_CUTOFF = 80
+FACILITY_MATCH_CUTOFF = 90
+
+SPLIT_RE = re.compile(r",| and | & |;")
+WS_RE = re.compile(r"\s+")
+
 def normalize(text: str) -> str:
-    return re.sub(r"\s+", " ", text.strip().lower())
+    return WS_RE.sub(" ", text.strip().lower())
+
+PUNCT_RE = re.compile(r"[^\w\s]")
+# Words shared by most facility names; left in, they let any "<X> Hospital" score high.
+GENERIC_FACILITY_WORDS = {"hospital", "hospitals"}
 
-ALL_LABELS = []
-for label, meta in danger_signs.items():
-    ALL_LABELS.append(label)
-    ALL_LABELS.extend(meta.get("synonyms", []))
+def facility_key(name: str) -> str:
+    words = PUNCT_RE.sub("", normalize(name)).split()
+    return " ".join(w for w in words if w not in GENERIC_FACILITY_WORDS)
+
+@st.cache_resource(show_spinner=False)
+def _label_index() -> Tuple[Tuple[str, ...], Tuple[str, ...], Dict[str, str]]:
+    # Choices keep the label-then-synonyms order; the reverse map resolves any
+    # matched label/synonym straight back to its canonical danger-sign key.
+    labels: List[str] = []
+    syn2key: Dict[str, str] = {}
+    for label, meta in danger_signs.items():
+        labels.append(label)
+        labels.extend(meta.get("synonyms", []))
+        syn2key[label] = label
+    for label, meta in danger_signs.items():
+        for syn in meta.get("synonyms", []):
+            syn2key.setdefault(syn, label)
+    return tuple(labels), tuple(normalize(l) for l in labels), syn2key
+
+ALL_LABELS, ALL_LABELS_NORM, SYN2KEY = _label_index()
 
 def classify_symptoms(user_text: str) -> Tuple[List[str], str, List[str]]:
     text = normalize(user_text)
     found, messages = [], []
 
-    parts = re.split(r",| and | & |;", text)
-    for p in parts:
-        p = p.strip()
-        if not p:
-            continue
-        match, score, _ = process.extractOne(p, ALL_LABELS, scorer=fuzz.WRatio)
-        if score >= 80:
-            key_label = match if match in danger_signs else next((lbl for lbl, meta in danger_signs.items() if match in meta.get("synonyms", [])), None)
-            if key_label and key_label not in found:
+    parts = [p.strip() for p in SPLIT_RE.split(text)]
+    parts = [p for p in parts if p]
+    if parts:
+        # One C++ call scores every fragment against every label; cells under the cutoff come back as 0.
+        scores = process.cdist(parts, ALL_LABELS_NORM, scorer=fuzz.WRatio, score_cutoff=SYMPTOM_MATCH_CUTOFF, dtype=np.uint8, workers=-1)
+        best = np.argmax(scores, axis=1)
+        hits = scores.max(axis=1) >= SYMPTOM_MATCH_CUTOFF
+        for j in best[hits]:
+            key_label = SYN2KEY[ALL_LABELS[j]]
+            if key_label not in found:
                 found.append(key_label)
                 messages.append(danger_signs[key_label]["advice"])
 
-    order = {"advice": 0, "monitor": 1, "urgent": 2, "emergency": 3}
-    worst = max((danger_signs[l]["urgency"] for l in found), key=lambda x: order.get(x, 0), default="advice")
+    worst = RANK_NAME[max((URGENCY_RANK[l] for l in found), default=0)]
     return found, worst, messages
 
+@st.cache_resource(show_spinner=False)
+def _cardiac_automaton() -> ahocorasick.Automaton:
+    automaton = ahocorasick.Automaton()
+    for kw in CARDIAC_KEYWORDS:
+        automaton.add_word(kw, kw)
+    automaton.make_automaton()
+    return automaton
+
+CARDIAC_AC = _cardiac_automaton()
+
 def looks_cardiac(matched_labels: List[str], raw_text: str) -> bool:
     raw = normalize(raw_text)
-    return any(lbl in CARDIAC_KEYWORDS for lbl in matched_labels) or any(kw in raw for kw in CARDIAC_KEYWORDS)
+    # Single linear pass over the text for all keywords at once.
+    return any(lbl in CARDIAC_KEYWORDS for lbl in matched_labels) or next(CARDIAC_AC.iter(raw), None) is not None
+
+@st.cache_resource(show_spinner=False)
+def _specialty_index() -> Tuple[Tuple[str, ...], Dict[str, int]]:
+    names_norm = tuple(facility_key(n) for n in SPEC_NAMES)
+    return names_norm, {n: i for i, n in enumerate(names_norm)}
+
+SPEC_NAMES_NORM, SPEC_INDEX = _specialty_index()
 
-def fuzzy_specialty_lookup(name: str) -> Tuple[bool, bool]:
-    rec = next((r for r in SPECIALTY_FACILITIES if normalize(r["facility_name"]) == normalize(name)), None)
-    if rec:
-        return rec["has_pediatric_cardiologist"], rec["has_chd_facilities"]
-    return False, False
+def _specialty_row(idx: int, score: float) -> Tuple[bool, bool, Optional[str], float]:
+    return bool(SPEC_PED[idx]), bool(SPEC_CHD[idx]), SPEC_NAMES[idx], score
+
+def fuzzy_specialty_lookup(name: str) -> Tuple[bool, bool, Optional[str], float]:
+    key = facility_key(name)
+    if not key:
+        return False, False, None, 0
+    idx = SPEC_INDEX.get(key)
+    if idx is not None:
+        return _specialty_row(idx, 100)
+    # SPEC_NAMES_NORM is in SPEC_NAMES order, so the match index addresses the columns directly.
+    # token_sort_ratio tolerates word order and spelling variants but, unlike WRatio,
+    # gives no partial-match credit for a single shared word.
+    hit = process.extractOne(key, SPEC_NAMES_NORM, scorer=fuzz.token_sort_ratio, score_cutoff=FACILITY_MATCH_CUTOFF)
+    if hit:
+        _, score, idx = hit
+        return _specialty_row(idx, score)
+    return False, False, None, 0
+
+def specialty_flags(names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    # Batched fuzzy_specialty_lookup: one cdist over every name instead of an extractOne per row.
+    keys = [facility_key(n) for n in names]
+    if not keys:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=bool)
+    scores = process.cdist(keys, SPEC_NAMES_NORM, scorer=fuzz.token_sort_ratio, score_cutoff=FACILITY_MATCH_CUTOFF, dtype=np.uint8)
+    best = np.argmax(scores, axis=1)
+    hits = (scores.max(axis=1) >= FACILITY_MATCH_CUTOFF) & np.array([bool(k) for k in keys])
+    return SPEC_PED[best] & hits, SPEC_CHD[best] & hits
 
 # ------------------------------
 # 3) GIS functions
 # ------------------------------
 
-def geocode_place(place: str) -> Optional[Tuple[float, float]]:
-    geolocator = Nominatim(user_agent="newborn_danger_chatbot")
-    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
-    loc = geocode(place)
+class PoliteRetry(Retry):
+    # urllib3 retries the first failure with no wait at all; Nominatim's policy asks for at
+    # least 1 s between requests, and Overpass doesn't welcome instant retries either.
+    MIN_BACKOFF_SECONDS = 1.0
+
+    def get_backoff_time(self) -> float:
+        return max(self.MIN_BACKOFF_SECONDS, super().get_backoff_time())
+
+@st.cache_resource(show_spinner=False)
+def _http_session() -> requests.Session:
+    # One pooled keep-alive session for Overpass and Nominatim, so repeat queries reuse TLS connections.
+    session = requests.Session()
+    session.headers.update({"User-Agent": "newborn_danger_chatbot_ke", "Accept-Encoding": "gzip"})
+    session.mount("https://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # Overpass queries are read-only, so POST is safe to retry. Read timeouts are not retried:
+        # one slow Overpass query already holds the Streamlit run for up to 30 s.
+        max_retries=PoliteRetry(
+            total=3,
+            read=0,
+            backoff_factor=1,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            respect_retry_after_header=True,
+        ),
+    ))
+    return session
+
+SESSION = _http_session()
+
+@st.cache_resource(show_spinner=False)
+def _disk_cache(directory: str) -> diskcache.Cache:
+    return diskcache.Cache(directory)
+
+# Cold tier under the in-memory st.cache_data layer, so results survive restarts.
+# Nominatim's usage policy asks clients to cache; OSM hospitals change on a scale of weeks.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+GEOCODE_DISK_CACHE = _disk_cache(os.path.join(APP_DIR, ".geocache"))
+OSM_DISK_CACHE = _disk_cache(os.path.join(APP_DIR, ".osm_cache"))
+
+@st.cache_resource(show_spinner=False)
+def _gis() -> SimpleNamespace:
+    # Heavy GIS stack, only imported once a hospital search actually runs.
+    import folium
+    import folium.plugins
+    import pandas
+    import pydeck
+    import shapely
+    return SimpleNamespace(folium=folium, FastMarkerCluster=folium.plugins.FastMarkerCluster, pd=pandas, pdk=pydeck, shapely=shapely)
+
+@st.cache_resource(show_spinner=False)
+def _geocoder():
+    from geopy.geocoders import Nominatim
+    from geopy.extra.rate_limiter import RateLimiter
+    from geopy.adapters import RequestsAdapter
+
+    class SharedSessionAdapter(RequestsAdapter):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.session.close()
+            self.session = SESSION
+
+    geolocator = Nominatim(user_agent="newborn_danger_chatbot", adapter_factory=SharedSessionAdapter)
+    # Let Nominatim errors propagate: st.cache_data would otherwise cache a swallowed error as "not found".
+    # Retries already happen in SESSION's urllib3 Retry; a second layer here would multiply them.
+    return RateLimiter(geolocator.geocode, min_delay_seconds=1, max_retries=0, swallow_exceptions=False)
+
+@st.cache_data(ttl=86400, max_entries=1024, show_spinner=False)
+def _geocode_normalized(place: str) -> Optional[Tuple[float, float]]:
+    coords = GEOCODE_DISK_CACHE.get(place)
+    if coords is not None:
+        return coords
+    loc = _geocoder()(place)
     if not loc:
         return None
-    return (loc.latitude, loc.longitude)
+    coords = (loc.latitude, loc.longitude)
+    GEOCODE_DISK_CACHE.set(place, coords, expire=30 * 86400)
+    return coords
+
+def geocode_place(place: str) -> Optional[Tuple[float, float]]:
+    return _geocode_normalized(normalize(place))
 
-def build_map(lat: float, lon: float, radius_km: int = 10):
-    tags = {"amenity": "hospital"}
-    gdf = ox.geometries_from_point((lat, lon), tags=tags, dist=radius_km*1000)
+# Leaflet-side marker factory for FastMarkerCluster rows of [lat, lon, popup_html, color].
+MARKER_CALLBACK = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({markerColor: row[3]});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindPopup(row[2]);
+    return marker;
+}
+"""
 
-    m = folium.Map(location=[lat, lon], zoom_start=12)
-    folium.Marker([lat, lon], popup="Your Location", icon=folium.Icon(color="blue")).add_to(m)
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _osm_hospitals(lat_q: float, lon_q: float, radius_km: int) -> List[Tuple[Optional[str], Optional[str], float, float]]:
+    key = f"{lat_q}_{lon_q}_{radius_km}"
+    rows = OSM_DISK_CACHE.get(key)
+    if rows is not None:
+        return rows
+    around = f"(around:{radius_km * 1000},{lat_q},{lon_q})"
+    # One union query for both tagging schemes; "out center" has Overpass compute way/relation centroids.
+    q = f'[out:json][timeout:25];(nwr["amenity"="hospital"]{around};nwr["healthcare"="hospital"]{around};);out center tags;'
+    resp = SESSION.post(OVERPASS_URL, data={"data": q}, timeout=30)
+    resp.raise_for_status()
+    payload = orjson.loads(resp.content)
+    # Overpass reports timeouts and out-of-memory as HTTP 200 with a "remark" and partial
+    # elements; raising keeps that out of both cache layers.
+    if payload.get("remark"):
+        raise RuntimeError(f"Overpass query incomplete: {payload['remark']}")
+    rows = []
+    for el in payload["elements"]:
+        pt = el if "lat" in el else el.get("center")
+        if not pt:
+            continue
+        tags = el.get("tags", {})
+        rows.append((tags.get("name") or tags.get("official_name"), tags.get("addr:county"), pt["lat"], pt["lon"]))
+    OSM_DISK_CACHE.set(key, rows, expire=7 * 86400)
+    return rows
+
+# Overpass is fetched at the next tier up (with one grid cell of slack for snapping), so
+# smaller radii and small centre moves are answered from the cached result.
+RADIUS_TIERS_KM = (5, 10, 20, 35, 55)
+
+def _fetch_radius_km(radius_km: int) -> int:
+    return next((t for t in RADIUS_TIERS_KM if t >= radius_km + 1), radius_km + 1)
+
+@st.cache_resource(ttl=3600, max_entries=256, show_spinner=False)
+def _hospital_index(lat_q: float, lon_q: float, fetch_km: int):
+    rows = _osm_hospitals(lat_q, lon_q, fetch_km)
+    # Column arrays, so per-search filtering is plain fancy indexing.
+    names = np.array([r[0] for r in rows], dtype=object)
+    counties = np.array([r[1] for r in rows], dtype=object)
+    lats = np.array([r[2] for r in rows], dtype=float)
+    lons = np.array([r[3] for r in rows], dtype=float)
+    shapely = _gis().shapely
+    return names, counties, lats, lons, shapely.STRtree(shapely.points(lons, lats))
+
+def osm_hospitals(lat: float, lon: float, radius_km: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Snap to a ~1 km grid so nearby searches share one Overpass result and spatial index.
+    names, counties, lats, lons, tree = _hospital_index(round(lat, 2), round(lon, 2), _fetch_radius_km(radius_km))
+    dlat = radius_km / 111.32
+    dlon = radius_km / (111.32 * max(math.cos(math.radians(lat)), 1e-6))
+    bbox = _gis().shapely.box(lon - dlon, lat - dlat, lon + dlon, lat + dlat)
+    idx = np.sort(tree.query(bbox, predicate="intersects"))
+    return names[idx], counties[idx], lats[idx], lons[idx]
+
+EARTH_RADIUS_KM = 6371.0088
+
+@st.cache_resource(show_spinner=False)
+def _haversine_kernel():
+    # numba is imported and the kernel compiled on the first search, not on page load.
+    # Serial on purpose: a few hundred points don't repay parallel compile and thread start-up.
+    import numba
+
+    @numba.njit(cache=True, fastmath=True)
+    def kernel(lat0, lon0, lats, lons, radius_km):
+        mask = np.empty(lats.shape[0], dtype=np.bool_)
+        phi0 = math.radians(lat0)
+        cos_phi0 = math.cos(phi0)
+        for i in range(lats.shape[0]):
+            phi = math.radians(lats[i])
+            a = math.sin((phi - phi0) / 2) ** 2 + cos_phi0 * math.cos(phi) * math.sin(math.radians(lons[i] - lon0) / 2) ** 2
+            mask[i] = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))) <= radius_km
+        return mask
+
+    return kernel
 
-    for _, row in gdf.iterrows():
-        name = row.get("name") or "Unnamed Hospital"
-        coords = (row.geometry.centroid.y, row.geometry.centroid.x) if row.geometry else None
-        if not coords:
+def haversine_mask(lat0: float, lon0: float, lats: np.ndarray, lons: np.ndarray, radius_km: float) -> np.ndarray:
+    # True for points within radius_km (great-circle distance) of (lat0, lon0).
+    return _haversine_kernel()(lat0, lon0, lats, lons, radius_km)
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _hospital_points(lat: float, lon: float, radius_km: int, only_specialty: bool) -> List[list]:
+    # One [lat, lon, popup_html, color] row per hospital inside the search circle.
+    names, counties, ys, xs = osm_hospitals(lat, lon, radius_km)
+    # The spatial index returns a bounding box; keep only the true circle.
+    valid = haversine_mask(lat, lon, ys, xs, float(radius_km))
+
+    names = [n if isinstance(n, str) and n else "Unnamed Hospital" for n in names[valid]]
+    # Same lookup in both modes, so a hospital keeps its colour when the filter is toggled.
+    peds, chds = specialty_flags(names)
+    data = []
+    for name, county, y, x, has_ped, has_chd in zip(names, counties[valid], ys[valid], xs[valid], peds.tolist(), chds.tolist()):
+        if only_specialty and not (has_ped or has_chd):
             continue
-        has_ped, has_chd = fuzzy_specialty_lookup(name)
         color = "green" if has_ped or has_chd else "orange"
-        badge = ", ".join([x for x, flag in [("Pediatric Cardiology", has_ped), ("CHD Facilities", has_chd)] if flag]) or "General hospital"
+        badge = ", ".join([label for label, flag in [("Pediatric Cardiology", has_ped), ("CHD Facilities", has_chd)] if flag]) or "General hospital"
         popup_html = f"<b>{name}</b><br/>Services: {badge}"
-        folium.Marker(coords, popup=popup_html, icon=folium.Icon(color=color)).add_to(m)
+        if county:
+            popup_html += f"<br/>County: {county}"
+        data.append([float(y), float(x), popup_html, color])
+    return data
 
+def hospital_points(lat: float, lon: float, radius_km: int, only_specialty: bool = False) -> List[list]:
+    # Same ~100 m cell as map_html, so the count check and both renderers share one computation.
+    return _hospital_points(round(lat, 3), round(lon, 3), radius_km, only_specialty)
+
+def build_map(lat: float, lon: float, points: List[list]):
+    gis = _gis()
+    folium = gis.folium
+    m = folium.Map(location=[lat, lon], zoom_start=12)
+    folium.Marker([lat, lon], popup="Your Location", icon=folium.Icon(color="blue")).add_to(m)
+    if points:
+        gis.FastMarkerCluster(points, callback=MARKER_CALLBACK).add_to(m)
     return m
 
+# Above this many hospitals, render with a WebGL layer instead of Leaflet markers.
+PYDECK_THRESHOLD = 300
+DECK_COLORS = {"green": [0, 200, 0, 200], "orange": [255, 165, 0, 200], "blue": [30, 100, 255, 230]}
+
+def build_deck(lat: float, lon: float, points: List[list]):
+    gis = _gis()
+    pd, pdk = gis.pd, gis.pdk
+    df = pd.DataFrame(points, columns=["lat", "lon", "popup", "color"])
+    df["color"] = df["color"].map(DECK_COLORS)
+    you = pd.DataFrame({"lat": [lat], "lon": [lon], "popup": ["Your Location"], "color": [DECK_COLORS["blue"]]})
+    layers = [
+        pdk.Layer("ScatterplotLayer", df, get_position="[lon, lat]", get_fill_color="color", get_radius=80, pickable=True),
+        pdk.Layer("ScatterplotLayer", you, get_position="[lon, lat]", get_fill_color="color", get_radius=150, pickable=True),
+    ]
+    return pdk.Deck(
+        layers=layers,
+        initial_view_state=pdk.ViewState(latitude=lat, longitude=lon, zoom=12),
+        tooltip={"html": "{popup}"},
+    )
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _map_html(lat_r: float, lon_r: float, radius_km: int, only_specialty: bool) -> str:
+    points = _hospital_points(lat_r, lon_r, radius_km, only_specialty)
+    return build_map(lat_r, lon_r, points).get_root().render()
+
+def map_html(lat: float, lon: float, radius_km: int, only_specialty: bool = False) -> str:
+    # folium.Map doesn't pickle cleanly, so cache the rendered page per ~100 m cell instead.
+    return _map_html(round(lat, 3), round(lon, 3), radius_km, only_specialty)
+
+@st.cache_resource(ttl=3600, max_entries=64, show_spinner=False)
+def _deck(lat_r: float, lon_r: float, radius_km: int, only_specialty: bool):
+    return build_deck(lat_r, lon_r, _hospital_points(lat_r, lon_r, radius_km, only_specialty))
+
+def deck(lat: float, lon: float, radius_km: int, only_specialty: bool = False):
+    return _deck(round(lat, 3), round(lon, 3), radius_km, only_specialty)
+
 # ------------------------------
 # 4) Streamlit UI
 # ------------------------------
 
-st.set_page_config(page_title="Newborn Danger Chatbot (Kenya)", page_icon="🍼", layout="wide")
 st.title("🍼 Newborn Danger Chatbot — Kenya")
 st.caption("Educational aid — not a substitute for professional medical care. Seek care immediately if concerned.")
 
@@ -150,8 +449,13 @@ with st.expander("How it works"):
 symptoms = st.text_input("Describe the baby's symptoms:", placeholder="e.g., blue lips, sweating while feeding")
 check_btn = st.button("Check symptoms")
 
-if check_btn and symptoms.strip():
-    matched, worst, adv_msgs = classify_symptoms(symptoms)
+# Widgets below the assessment rerun the script with check_btn=False, so keep the result in session state.
+if check_btn:
+    st.session_state["assessment"] = (symptoms, *classify_symptoms(symptoms)) if symptoms.strip() else None
+
+assessment = st.session_state.get("assessment")
+if assessment:
+    checked_text, matched, worst, adv_msgs = assessment
     if not matched:
         st.info("Couldn't confidently match danger signs. Seek care if concerned.")
     else:
@@ -161,22 +465,41 @@ if check_btn and symptoms.strip():
         for m in adv_msgs:
             st.write("- ", m)
 
-        cardiac_flag = looks_cardiac(matched, symptoms)
+        cardiac_flag = looks_cardiac(matched, checked_text)
         st.markdown("---")
         st.subheader("Find nearby hospitals")
+        if cardiac_flag:
+            st.info("These signs can point to a heart problem. Green markers show pediatric cardiology / CHD centres, but in an emergency go to the nearest hospital first.")
         place = st.text_input("Enter your location (town/estate/landmark)", value="Nairobi, Kenya")
         radius_km = st.slider("Search radius (km)", 1, 50, 15)
+        only_specialty = st.checkbox("Only show pediatric cardiology / CHD facilities", value=False)
 
         if st.button("Search hospitals"):
-            coords = geocode_place(place)
+            st.session_state["search_place"] = place
+
+        search_place = st.session_state.get("search_place")
+        if search_place:
+            try:
+                coords = geocode_place(search_place)
+            except Exception as e:
+                st.error(f"Location search is unavailable right now, please try again shortly ({e}).")
+                st.stop()
             if not coords:
                 st.error("Couldn't find that place. Try a nearby landmark or add county, e.g., 'Kahawa West, Nairobi'.")
             else:
                 lat, lon = coords
                 with st.spinner("Querying OpenStreetMap and building map..."):
                     try:
-                        fmap = build_map(lat, lon, radius_km)
-                        st_folium(fmap, width=1000, height=560)
+                        points = hospital_points(lat, lon, radius_km, only_specialty)
+                        if not points:
+                            if only_specialty:
+                                st.warning(f"No pediatric cardiology / CHD facilities found within {radius_km} km. Untick the filter to see all hospitals.")
+                            else:
+                                st.warning(f"No hospitals found within {radius_km} km. Try a larger search radius.")
+                        if len(points) > PYDECK_THRESHOLD:
+                            st.pydeck_chart(deck(lat, lon, radius_km, only_specialty))
+                        else:
+                            components.html(map_html(lat, lon, radius_km, only_specialty), height=560)
                         st.caption("Green = Pediatric Cardiology / CHD. Orange = general hospital.")
                     except Exception as e:
                         st.error(f"Error while building the map: {e}")
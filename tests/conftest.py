@@ -0,0 +1,22 @@
+import os
+import sys
+
+import diskcache
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch, tmp_path):
+    # Never read or write the app's real on-disk caches, and start each test with empty memory caches.
+    import app
+
+    monkeypatch.setattr(app, "GEOCODE_DISK_CACHE", diskcache.Cache(str(tmp_path / "geocache")))
+    monkeypatch.setattr(app, "OSM_DISK_CACHE", diskcache.Cache(str(tmp_path / "osm_cache")))
+    st_caches = [app._geocode_normalized, app._osm_hospitals, app._hospital_index, app._hospital_points, app._map_html, app._deck]
+    for cache in st_caches:
+        cache.clear()
+    yield
+    for cache in st_caches:
+        cache.clear()
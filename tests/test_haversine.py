@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import app
+
+
+def _np_haversine_km(lat0, lon0, lats, lons):
+    phi0, phi = np.radians(lat0), np.radians(lats)
+    a = np.sin((phi - phi0) / 2) ** 2 + np.cos(phi0) * np.cos(phi) * np.sin(np.radians(lons - lon0) / 2) ** 2
+    return 2 * app.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _points_at(lat0, lon0, distances_km, bearings_deg):
+    # Destination points for each (distance, bearing) on the same sphere as the app.
+    phi0, lam0 = np.radians(lat0), np.radians(lon0)
+    delta = np.asarray(distances_km) / app.EARTH_RADIUS_KM
+    theta = np.radians(bearings_deg)
+    phi = np.arcsin(np.sin(phi0) * np.cos(delta) + np.cos(phi0) * np.sin(delta) * np.cos(theta))
+    lam = lam0 + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(phi0), np.cos(delta) - np.sin(phi0) * np.sin(phi))
+    return np.degrees(phi), np.degrees(lam)
+
+
+@pytest.mark.parametrize("lat0, lon0, radius_km", [(-1.2921, 36.8219, 15.0), (0.5143, 35.2698, 1.0), (-4.0435, 39.6682, 50.0)])
+def test_mask_matches_numpy_haversine_around_the_radius(lat0, lon0, radius_km):
+    bearings = np.arange(0, 360, 30, dtype=float)
+    # 10 m either side of the boundary, plus points well inside and outside, in every direction.
+    offsets = [-0.01, 0.01, -radius_km / 2, radius_km]
+    distances = np.repeat([radius_km + o for o in offsets], len(bearings))
+    lats, lons = _points_at(lat0, lon0, distances, np.tile(bearings, len(offsets)))
+
+    mask = app.haversine_mask(lat0, lon0, lats, lons, radius_km)
+
+    expected = _np_haversine_km(lat0, lon0, lats, lons) <= radius_km
+    assert mask.dtype == np.bool_
+    np.testing.assert_array_equal(mask, expected)
+    np.testing.assert_array_equal(mask, distances <= radius_km)
+
+
+def test_mask_empty_input():
+    empty = np.array([], dtype=float)
+    mask = app.haversine_mask(-1.2921, 36.8219, empty, empty, 10.0)
+    assert mask.dtype == np.bool_
+    assert mask.shape == (0,)
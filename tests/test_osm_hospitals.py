@@ -0,0 +1,89 @@
+import math
+import re
+from unittest import mock
+
+import numpy as np
+import orjson
+import pytest
+
+import app
+
+
+def _response(payload):
+    resp = mock.Mock(content=orjson.dumps(payload))
+    resp.raise_for_status.return_value = None
+    return resp
+
+
+KEY = "-1.29_36.82_5"
+
+
+def test_incomplete_overpass_result_is_not_cached():
+    remark = "runtime error: Query timed out in \"query\" at line 1 after 25 seconds."
+    with mock.patch.object(app.SESSION, "post", return_value=_response({"remark": remark, "elements": []})):
+        with pytest.raises(RuntimeError, match="incomplete"):
+            app._osm_hospitals(-1.29, 36.82, 5)
+    assert app.OSM_DISK_CACHE.get(KEY) is None
+
+
+def test_complete_overpass_result_is_parsed_and_cached():
+    elements = [
+        {"type": "node", "lat": -1.3, "lon": 36.8, "tags": {"name": "Kenyatta National Hospital"}},
+        {"type": "way", "center": {"lat": -1.26, "lon": 36.82}, "tags": {"official_name": "Aga Khan University Hospital Nairobi", "addr:county": "Nairobi"}},
+        {"type": "relation", "tags": {"name": "No geometry"}},
+    ]
+    with mock.patch.object(app.SESSION, "post", return_value=_response({"elements": elements})):
+        rows = app._osm_hospitals(-1.29, 36.82, 5)
+    assert rows == [
+        ("Kenyatta National Hospital", None, -1.3, 36.8),
+        ("Aga Khan University Hospital Nairobi", "Nairobi", -1.26, 36.82),
+    ]
+    assert app.OSM_DISK_CACHE.get(KEY) == rows
+
+
+KM_PER_DEG_LAT = app.EARTH_RADIUS_KM * math.pi / 180
+
+
+def _fake_overpass(hospitals):
+    # Answers like Overpass: only hospitals within the query's (around:r,lat,lon) circle.
+    def post(url, data, timeout):
+        r_m, lat0, lon0 = map(float, re.search(r"around:([\d.]+),([-\d.]+),([-\d.]+)", data["data"]).groups())
+        lats = np.array([h[1] for h in hospitals])
+        lons = np.array([h[2] for h in hospitals])
+        inside = _np_haversine_km(lat0, lon0, lats, lons) <= r_m / 1000
+        elements = [{"type": "node", "lat": h[1], "lon": h[2], "tags": {"name": h[0]}} for h, ok in zip(hospitals, inside) if ok]
+        return _response({"elements": elements})
+    return post
+
+
+def _np_haversine_km(lat0, lon0, lats, lons):
+    phi0, phi = np.radians(lat0), np.radians(lats)
+    a = np.sin((phi - phi0) / 2) ** 2 + np.cos(phi0) * np.cos(phi) * np.sin(np.radians(lons - lon0) / 2) ** 2
+    return 2 * app.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def test_snapped_search_keeps_points_just_inside_radius():
+    lat, lon, radius_km = -1.2852, 36.8200, 4
+    # hospital_points rounds to 3 dp, osm_hospitals then snaps to 2 dp; place the hospitals on
+    # the far side of the 3 dp centre from the snapped one, where snapping could cut them off.
+    lat3 = round(lat, 3)
+    away = math.copysign(1, lat3 - round(lat3, 2))
+    hospitals = [
+        ("Just Inside Hospital", lat3 + away * (radius_km - 0.05) / KM_PER_DEG_LAT, lon),
+        ("Just Outside Hospital", lat3 + away * (radius_km + 0.05) / KM_PER_DEG_LAT, lon),
+    ]
+    with mock.patch.object(app.SESSION, "post", side_effect=_fake_overpass(hospitals)):
+        points = app.hospital_points(lat, lon, radius_km)
+    names = [p[2] for p in points]
+    assert any("Just Inside Hospital" in n for n in names)
+    assert not any("Just Outside Hospital" in n for n in names)
+
+
+def test_smaller_radius_reuses_cached_tier():
+    hospitals = [("Near Hospital", -1.29, 36.821), ("Far Hospital", -1.29, 36.85)]
+    with mock.patch.object(app.SESSION, "post", side_effect=_fake_overpass(hospitals)) as post:
+        four_km = app.osm_hospitals(-1.2901, 36.8205, 4)
+        one_km = app.osm_hospitals(-1.2899, 36.8195, 1)
+    assert post.call_count == 1
+    assert list(four_km[0]) == ["Near Hospital", "Far Hospital"]
+    assert list(one_km[0]) == ["Near Hospital"]
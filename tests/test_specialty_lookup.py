@@ -0,0 +1,51 @@
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize("name", [
+    "Hospital",
+    "Unnamed Hospital",
+    "Coptic Hospital",
+    "Mater Hospital",
+    "MP Shah Hospital",
+    "Kenyatta Hospital",
+    "Children Hospital",
+    "Nairobi West Hospital",
+    "Nairobi Women's Hospital",
+    "Aga Khan Hospital Kisumu",
+])
+def test_general_hospitals_are_not_flagged(name):
+    assert app.fuzzy_specialty_lookup(name) == (False, False, None, 0)
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Kenyatta National Hospital", "Kenyatta National Hospital"),
+    ("kenyatta  national hospital", "Kenyatta National Hospital"),
+    ("Gertrudes Childrens Hospital", "Gertrude's Children's Hospital"),
+    ("Aga Khan University Hospital, Nairobi", "Aga Khan University Hospital Nairobi"),
+    ("Nairobi Aga Khan University Hospital", "Aga Khan University Hospital Nairobi"),
+])
+def test_curated_facilities_still_match(name, expected):
+    has_ped, has_chd, matched, _ = app.fuzzy_specialty_lookup(name)
+    assert (has_ped, has_chd, matched) == (True, True, expected)
+
+
+def test_batched_flags_agree_with_single_lookup():
+    names = [
+        "Kenyatta National Hospital",
+        "Unnamed Hospital",
+        "Hospital",
+        "Gertrudes Childrens Hospital",
+        "Coptic Hospital",
+        "Nairobi Aga Khan University Hospital",
+        "Aga Khan Hospital Kisumu",
+    ]
+    peds, chds = app.specialty_flags(names)
+    expected = [app.fuzzy_specialty_lookup(n)[:2] for n in names]
+    assert list(zip(peds.tolist(), chds.tolist())) == expected
+
+
+def test_batched_flags_empty():
+    peds, chds = app.specialty_flags([])
+    assert peds.shape == chds.shape == (0,)